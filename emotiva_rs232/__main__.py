@@ -1,18 +1,22 @@
-"""A simple test application for controlling Emotiva Fusion-Flex."""
+"""
+A simple test application for controlling Emotiva Fusion-Flex.
+
+Run it with: python -m emotiva_rs232
+"""
 import asyncio
 import logging
-import threading
-import time
-
-import keyboard
 
-from emotiva_rs232 import (ConnectionType, FusionFlexDevice,
-                           FusionFlexSourceMode)
+try:
+    import keyboard
+except ImportError as ex:
+    raise SystemExit(
+        'The test application requires the "keyboard" package, '
+        'install it with: pip install "emotiva-rs232[app]"'
+    ) from ex
 
+from .const import ConnectionType
+from .fusion_flex import FusionFlexDevice, FusionFlexSourceMode
 
-def _run_event_loop(loop):
-    """Helper function for running an event loop in a separate thread."""
-    loop.run_forever()
 
 def _status_changed(device: FusionFlexDevice):
     """A callback for receiving device status changes."""
@@ -53,23 +57,21 @@ def _print_options():
         desc_and_func = option[1]
         print(f'  ({key}) {desc_and_func[0]}')
 
-def main():
-    """Main function."""
-    logging.basicConfig()
-    logging.getLogger().setLevel(logging.DEBUG)
+async def _async_main():
+    """Asynchronous main function."""
     # test using a serial connection:
     #device = FusionFlexDevice(ConnectionType.SERIAL, "COM1")
     # test using UDP:
     device = FusionFlexDevice(ConnectionType.UDP,
         remote_hostname= "127.0.0.1", remote_port=5000)
     device.set_status_changed(_status_changed)
-    loop = asyncio.new_event_loop()
-    loop.run_until_complete(device.async_start())
-    threading.Thread(target=_run_event_loop, args=[loop]).start()
+    await device.async_start()
+    loop = asyncio.get_running_loop()
     try:
         _print_options()
         while True:
-            key = keyboard.read_key()
+            # wait for a key without blocking the event loop:
+            key = await loop.run_in_executor(None, keyboard.read_key)
             if key == "shift":
                 continue # an optiomization - shift can be pressed often.
             option =  _OPTIONS.get(key)
@@ -80,10 +82,17 @@ def main():
             # execute the chosen option:
             print(description)
             action(device)
-            # sleep a little between executions:
-            time.sleep(0.5)
-    except InterruptedError:
-        loop.stop()
+    finally:
+        await device.async_stop()
+
+def main():
+    """Main function."""
+    logging.basicConfig()
+    logging.getLogger().setLevel(logging.DEBUG)
+    try:
+        asyncio.run(_async_main())
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == '__main__':
@@ -6,6 +6,15 @@ from .const import ConnectionType
 class EmotivaDevice:
     """A base class for all Emotiva-RS232 devices."""
 
+    __slots__ = (
+        "_connection_type",
+        "_serial_port",
+        "_local_ip",
+        "_local_port",
+        "_remote_hostname",
+        "_remote_port",
+    )
+
     @property
     def connection_type(self) -> ConnectionType:
         """Get connection type."""
@@ -19,12 +28,12 @@ class EmotivaDevice:
     @property
     def local_ip(self) -> str:
         """Get local IP address."""
-        return self._remote_hostname
+        return self._local_ip
 
     @property
     def local_port(self) -> int:
         """Get local UDP/TCP port number."""
-        return self._remote_port
+        return self._local_port
 
     @property
     def remote_hostname(self) -> str:
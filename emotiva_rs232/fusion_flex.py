@@ -1,7 +1,7 @@
 """Classes for controlling Emotiva Fusion Flex over RS232."""
 import asyncio
 import logging
-import re
+import socket
 from collections.abc import Callable
 from enum import Enum, IntEnum
 
@@ -15,11 +15,15 @@ MIN_VOLUME_DB: float = -95.5
 MAX_VOLUME_DB: float = 0
 BAUD_RATE: int = 9600
 WRITE_TIMEOUT: int = 3
+UDP_RECEIVE_BUFFER_SIZE: int = 1 << 20
+UDP_SEND_BUFFER_SIZE: int = 1 << 20
 _BUFFER_SIZE: int = 16
 _ENCODING: str = "ascii"
 
-_MESSAGE_START_STR = "'@"
-_MESSAGE_END_STR = "'"
+_MESSAGE_START = b"'@"
+_MESSAGE_END = b"'"
+_VOLUME_MESSAGE_PREFIX = b"'@11"
+_VOLUME_MESSAGE_LENGTH = len(b"'@11P-00.0'")
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -44,6 +48,23 @@ class RS232Command(Enum):
     SET_VOLUME_DB_FORMAT = "'@11P-{0:04.1f}'"
 
 
+# pre-encoded forms of all the fixed (non-format) commands:
+_COMMAND_BYTES: dict[str, bytes] = {
+    command.value: command.value.encode(_ENCODING)
+    for command in RS232Command
+    if "{" not in command.value
+}
+# a bytes equivalent of RS232Command.SET_VOLUME_DB_FORMAT:
+_SET_VOLUME_DB_FORMAT_BYTES = b"'@11P-%04.1f'"
+# pre-encoded set-volume commands for each 0.5dB step from MIN_VOLUME_DB
+# (index 0) to MAX_VOLUME_DB:
+_VOLUME_STEPS: int = round(2 * (MAX_VOLUME_DB - MIN_VOLUME_DB))
+_SET_VOLUME_COMMANDS: tuple[bytes, ...] = tuple(
+    _SET_VOLUME_DB_FORMAT_BYTES % abs(MIN_VOLUME_DB + step / 2.0)
+    for step in range(_VOLUME_STEPS + 1)
+)
+
+
 class FusionFlexSourceMode(IntEnum):
     """
     Enumeration of supported input source modes for the Emotiva Fusion Flex
@@ -58,23 +79,51 @@ class FusionFlexSourceMode(IntEnum):
 class FusionFlexProtocol(asyncio.Protocol, asyncio.DatagramProtocol):
     """Implementation of the Fusion Flex protocol for asyncio"""
 
+    __slots__ = (
+        "transport",
+        "_remote_endpoint",
+        "_message_received",
+        "_user_token",
+        "_buffer",
+        "_send_impl",
+        "_drain_scheduled",
+    )
+
     def __init__(
         self,
         remote_endpoint,
-        message_received: Callable[[any, str], None],
+        message_received: Callable[[bytes], None],
         user_token: any = None,
     ):
         self.transport: asyncio.BaseTransport = None
         self._remote_endpoint = remote_endpoint
-        self._message_received: Callable[[any, str], None] = message_received
+        self._message_received: Callable[[bytes], None] = message_received
         self._user_token: any = user_token
-        self._buffer: str = ""
+        self._buffer: bytearray = bytearray()
+        self._send_impl: Callable[[bytes], None] = None
+        self._drain_scheduled: bool = False
 
     def connection_made(self, transport):
         self.transport = transport
+        # resolve the send method once per connection, instead of per command:
+        if isinstance(transport, serial_asyncio.SerialTransport):
+            self._send_impl = transport.write
+        elif (isinstance(transport, asyncio.DatagramTransport)
+                # (not all event loops' datagram transports derive from
+                # asyncio.DatagramTransport, so also look for sendto):
+                or hasattr(transport, "sendto")):
+            self._send_impl = lambda command_bytes: transport.sendto(
+                command_bytes, self._remote_endpoint
+            )
+        else:
+            raise NotImplementedError(f'unsupported transport "{transport}"')
         _LOGGER.info("Connected to %s", transport)
 
     def connection_lost(self, exc):
+        self._send_impl = None
+        # drop pending data, so a drain that's already scheduled
+        # doesn't deliver messages after the connection is gone:
+        del self._buffer[:]
         if exc is not None:
             _LOGGER.warning("Connection to %s was lost", self.transport)
             _LOGGER.warning(exc, exc_info=True)
@@ -82,12 +131,23 @@ class FusionFlexProtocol(asyncio.Protocol, asyncio.DatagramProtocol):
             _LOGGER.warning("Connection to %s closed", self.transport)
 
     def data_received(self, data):
-        self._process_data(data)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug('Data received: "%s"', data)
+        # coalesce serial reads that arrive in the same event loop iteration,
+        # and process them together:
+        self._buffer.extend(data)
+        if not self._drain_scheduled:
+            self._drain_scheduled = True
+            asyncio.get_running_loop().call_soon(self._drain)
+
+    def _drain(self):
+        self._drain_scheduled = False
+        self._process_buffer()
 
     def datagram_received(self, data, addr):
         if self._remote_endpoint == addr:
             self._process_data(data)
-        else:
+        elif _LOGGER.isEnabledFor(logging.DEBUG):
             _LOGGER.debug(
                 'received data from unexpected source %s: "%s"', addr, repr(data)
             )
@@ -101,52 +161,77 @@ class FusionFlexProtocol(asyncio.Protocol, asyncio.DatagramProtocol):
     def resume_writing(self):
         _LOGGER.debug("resume_writing() has been called")
 
-    def _process_message(self, msg: str):
+    def _process_message(self, msg: bytes):
         if self._message_received is not None:
             self._message_received(msg)
 
-    def _process_data(self, data: bytearray):
-        data_str: str = data.decode(_ENCODING)
-        _LOGGER.debug('Data received: "%s"', data_str)
-        first_segment = True
-        for segment in data_str.split(_MESSAGE_START_STR):
-            if len(segment) == 0:  # empty string - nothing to do.
-                first_segment = False
-                continue
-            if not first_segment:
-                # add back the message-start sequence that was
-                # removed by the call to split:
-                self._buffer = _MESSAGE_START_STR
-            if self._buffer.startswith(_MESSAGE_START_STR):
-                # look for message end:
-                msg_end = segment.find(_MESSAGE_END_STR)
-                if msg_end < 0:  # message end is not in data_str
-                    # protect against buffer overflow:
-                    if len(self._buffer) + len(segment) <= _BUFFER_SIZE:
-                        self._buffer += segment
-                    else:
-                        self._buffer = ""
-                    return
-                msg = self._buffer + segment
+    def _process_data(self, data: bytes):
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug('Data received: "%s"', data)
+        self._buffer.extend(data)
+        self._process_buffer()
+
+    def _process_buffer(self):
+        buffer = self._buffer
+        pos = 0
+        try:
+            while True:
+                msg_start = buffer.find(_MESSAGE_START, pos)
+                if msg_start < 0:  # no more messages in buffer
+                    # discard what's left, except for a trailing "'" that may
+                    # be the first half of the next message-start sequence:
+                    keep_last = buffer.endswith(_MESSAGE_END, pos)
+                    pos = len(buffer) - 1 if keep_last else len(buffer)
+                    break
+                msg_end = buffer.find(_MESSAGE_END, msg_start + len(_MESSAGE_START))
+                if msg_end < 0:  # message end is not in buffer
+                    # keep the partial message until the rest of it arrives:
+                    pos = msg_start
+                    break
+                if buffer.startswith(_MESSAGE_START, msg_end):
+                    # the message was cut short, and this "'" is the start of the
+                    # next one - drop the partial message and continue from here:
+                    pos = msg_end
+                    continue
+                msg = bytes(buffer[msg_start:msg_end + 1])
+                # consume the message before dispatching it, so it isn't
+                # delivered again if the callback raises:
+                pos = msg_end + 1
+                is_last = pos == len(buffer)
+                if is_last:
+                    # keep the final "'" until more data arrives, since it may
+                    # also be the first half of the next message-start sequence:
+                    pos = msg_end
                 self._process_message(msg)
-                self._buffer = ""
-            first_segment = False
+                if is_last:
+                    break
+        finally:
+            del buffer[:pos]
+            # protect against buffer overflow:
+            if len(buffer) > _BUFFER_SIZE:
+                del buffer[:]
 
     def send(self, command: str):
         """Send a command to the device over the chosen connection type."""
-        _LOGGER.debug('Outgoing message to device: [%s]', command)
-        command_bytes = command.encode(_ENCODING)
-        if isinstance(self.transport, serial_asyncio.SerialTransport):
-            transport: serial_asyncio.SerialTransport = self.transport
-            transport.write(command_bytes)
-        elif isinstance(self.transport, asyncio.DatagramTransport):
-            transport: asyncio.DatagramTransport = self.transport
-            transport.sendto(command_bytes, self._remote_endpoint)
-        else:
-            raise NotImplementedError()
+        command_bytes = _COMMAND_BYTES.get(command)
+        if command_bytes is None:
+            command_bytes = command.encode(_ENCODING)
+        self.send_bytes(command_bytes)
+
+    def send_bytes(self, command_bytes: bytes):
+        """Send an already encoded command to the device."""
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug('Outgoing message to device: [%s]', command_bytes)
+        send_impl = self._send_impl
+        if send_impl is None:
+            raise ConnectionError("not connected")
+        send_impl(command_bytes)
 
 class FusionFlexStatus:
     """Represents the status of a Fusion-Flex stereo amplifier."""
+
+    __slots__ = ("_is_turned_on", "_volume_db", "_source_mode", "_is_muted")
+
     @property
     def is_turned_on(self) -> bool:
         """Indicates whether the device is turned on."""
@@ -160,6 +245,8 @@ class FusionFlexStatus:
     @property
     def volume_fraction(self) -> float | None:
         """Gets volume level as a value between 0 and 1."""
+        if self._volume_db is None:
+            return None
         return FusionFlexDevice.volume_decibels_to_fraction(self._volume_db)
 
     @property
@@ -198,19 +285,56 @@ class FusionFlexStatus:
         return "null" if self.source_mode is None else f'"{self.source_mode.name}"'
 
     def __str__(self):
-        return ('{' +
-            f'"is_turned_on":{self.is_turned_on}, ' +
-            f'"volume_db": {self.volume_db}, ' +
-            f'"source_mode": {self._get_source_mode_as_json_str()}, ' +
-            f'"is_muted": {self.is_muted}' +
-             '}')
+        return (f'{{"is_turned_on":{self._is_turned_on}, '
+                f'"volume_db": {self._volume_db}, '
+                f'"source_mode": {self._get_source_mode_as_json_str()}, '
+                f'"is_muted": {self._is_muted}}}')
+
+
+_POWER_OFF_MESSAGE = _COMMAND_BYTES[RS232Command.POWER_OFF.value]
+
+# status updates for incoming (non-volume) messages, keyed by message:
+_MESSAGE_HANDLERS: dict[bytes, Callable[[FusionFlexStatus], None]] = {
+    _COMMAND_BYTES[RS232Command.POWER_ON.value]:
+        lambda status: setattr(status, "is_turned_on", True),
+    _COMMAND_BYTES[RS232Command.POWER_OFF.value]:
+        lambda status: setattr(status, "is_turned_on", False),
+    _COMMAND_BYTES[RS232Command.SELECT_INPUT_1.value]:
+        lambda status: setattr(status, "source_mode", FusionFlexSourceMode.INPUT_1),
+    _COMMAND_BYTES[RS232Command.SELECT_INPUT_2.value]:
+        lambda status: setattr(status, "source_mode", FusionFlexSourceMode.INPUT_2),
+    _COMMAND_BYTES[RS232Command.SELECT_INPUT_AUTO.value]:
+        lambda status: setattr(status, "source_mode", FusionFlexSourceMode.AUTO),
+    _COMMAND_BYTES[RS232Command.MUTE_ON.value]:
+        lambda status: setattr(status, "is_muted", True),
+    _COMMAND_BYTES[RS232Command.MUTE_OFF.value]:
+        lambda status: setattr(status, "is_muted", False),
+}
+
+# input selection commands, indexed by FusionFlexSourceMode value:
+_SELECT_INPUT_COMMANDS: tuple[RS232Command, ...] = (
+    RS232Command.SELECT_INPUT_AUTO,
+    RS232Command.SELECT_INPUT_1,
+    RS232Command.SELECT_INPUT_2,
+)
+
 
 class FusionFlexDevice(EmotivaDevice):
     """A class for controlling Emotiva Fusion Flex stereo amplifiers over RS232."""
 
+    __slots__ = (
+        "_rcvbuf_bytes",
+        "_sndbuf_bytes",
+        "_status",
+        "_started",
+        "_transport",
+        "_protocol",
+        "_status_changed_callback",
+    )
+
     @property
     def status(self) -> FusionFlexStatus:
-        """Get device status."""
+        """Get device status (the same object is updated in place)."""
         return self._status
 
     def set_status_changed(self, status_changed_callback: Callable[[EmotivaDevice],None]):
@@ -243,6 +367,8 @@ class FusionFlexDevice(EmotivaDevice):
         local_port: int = 0,
         remote_hostname: str = None,
         remote_port: int = 0,
+        rcvbuf_bytes: int = UDP_RECEIVE_BUFFER_SIZE,
+        sndbuf_bytes: int = UDP_SEND_BUFFER_SIZE,
     ) -> None:
         super().__init__(
             connection_type=connection_type,
@@ -251,43 +377,45 @@ class FusionFlexDevice(EmotivaDevice):
             local_port=local_port,
             remote_hostname=remote_hostname,
             remote_port=remote_port)
-        self._status: FusionFlexStatus = None
+        self._rcvbuf_bytes: int = rcvbuf_bytes
+        self._sndbuf_bytes: int = sndbuf_bytes
+        self._status: FusionFlexStatus = FusionFlexStatus(False)
         self._started: bool = False
         self._transport: asyncio.BaseTransport = None
         self._protocol: FusionFlexProtocol = None
         self._status_changed_callback: Callable[[EmotivaDevice], None] = None
 
-    def _process_message(self, msg: str):
-        _LOGGER.debug('Incoming message from device: [{%s}]', msg)
-        status = self._status if self._status is not None else FusionFlexStatus(True)
+    def _process_message(self, msg: bytes):
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug('Incoming message from device: [{%s}]',
+                          msg.decode(_ENCODING, "replace"))
+        status = self._status
         # check if the response contains the volume level:
-        result = re.search(r"^'@11[STP](-\d\d\.[05])'$", msg)
-        if result is not None:
+        # (a volume message has the fixed shape "'@11X-DD.D'", where X is one
+        # of S/T/P and the last digit is either 0 or 5, so it's checked
+        # byte by byte instead of through a regex):
+        if (len(msg) == _VOLUME_MESSAGE_LENGTH
+                and msg.startswith(_VOLUME_MESSAGE_PREFIX)
+                and msg[4] in b"STP"
+                and msg[5:6] == b"-"
+                and msg[6:8].isdigit()
+                and msg[8:9] == b"."
+                and msg[9] in b"05"
+                and msg[10:] == b"'"):
             # parse the volume level:
-            # - the regex should protect us from bad strings.
+            # - the checks above protect us from bad messages.
             # - we don't check volume range since it's already
-            #   limited to -99.5 to 0 dB by the regex.
-            status.volume_db = float(result.group(1))
-        elif msg == RS232Command.POWER_ON.value:
-            status.is_turned_on = True
-        elif msg == RS232Command.POWER_OFF.value:
-            status.is_turned_on = False
-        elif msg == RS232Command.SELECT_INPUT_1.value:
-            status.source_mode = FusionFlexSourceMode.INPUT_1
-        elif msg == RS232Command.SELECT_INPUT_2.value:
-            status.source_mode = FusionFlexSourceMode.INPUT_2
-        elif msg == RS232Command.SELECT_INPUT_AUTO.value:
-            status.source_mode = FusionFlexSourceMode.AUTO
-        elif msg == RS232Command.MUTE_ON.value:
-            status.is_muted = True
-        elif msg == RS232Command.MUTE_OFF.value:
-            status.is_muted = False
+            #   limited to -99.5 to 0 dB by the message format.
+            status.volume_db = float(msg[5:10])
         else:
-            _LOGGER.warning('Ignoring unknown message: "%s"', msg)
-            return
-        if msg != RS232Command.POWER_OFF.value:
+            handler = _MESSAGE_HANDLERS.get(msg)
+            if handler is None:
+                _LOGGER.warning('Ignoring unknown message: "%s"',
+                                msg.decode(_ENCODING, "replace"))
+                return
+            handler(status)
+        if msg != _POWER_OFF_MESSAGE:
             status.is_turned_on = True
-        self._status = status
         callback = self._status_changed_callback
         if callback is not None:
             callback(self)
@@ -325,6 +453,14 @@ class FusionFlexDevice(EmotivaDevice):
                 local_addr=local_endpoint,
                 remote_addr=remote_endpoint,
             )
+            # enlarge the socket buffers, so bursts of datagrams aren't
+            # dropped while the event loop is busy:
+            sock: socket.socket = self._transport.get_extra_info('socket')
+            if sock is not None:
+                if self._rcvbuf_bytes:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self._rcvbuf_bytes)
+                if self._sndbuf_bytes:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self._sndbuf_bytes)
         else:
             raise NotImplementedError(
                 f'unsupported connection type "{self._connection_type}"'
@@ -370,10 +506,8 @@ class FusionFlexDevice(EmotivaDevice):
         """
         # round to the nearest 0.5 dB:
         rounded_value = abs(round(2 * value) / 2.0)
-        # create a command string:
-        volume_command = RS232Command.SET_VOLUME_DB_FORMAT.value.format(rounded_value)
-        # send the command to the device:
-        self._send_command(volume_command)
+        # create the command (already encoded) and send it to the device:
+        self._protocol.send_bytes(_SET_VOLUME_DB_FORMAT_BYTES % rounded_value)
 
     def set_volume_level_fraction(self, value):
         """
@@ -382,21 +516,26 @@ class FusionFlexDevice(EmotivaDevice):
         Parameters:
             value (float): the volume level as a fraction between 0 and 1.
         """
-        value_decibels = FusionFlexDevice.volume_fraction_to_decibels(float(value))
-        self.set_volume_level_decibels(value_decibels)
+        value = float(value)
+        if value < 0 or value > 1:
+            raise ValueError('fraction must be between 0 and 1.')
+        # map the fraction straight to the nearest 0.5dB step (rounding
+        # the doubled decibels, just like set_volume_level_decibels):
+        value_doubled_db = 2 * (MIN_VOLUME_DB + value * (MAX_VOLUME_DB - MIN_VOLUME_DB))
+        step = round(value_doubled_db) - round(2 * MIN_VOLUME_DB)
+        self._protocol.send_bytes(_SET_VOLUME_COMMANDS[step])
 
     def select_input_source(self, source: FusionFlexSourceMode):
         """Select input source."""
-        command: RS232Command
-        if source == FusionFlexSourceMode.AUTO:
-            command = RS232Command.SELECT_INPUT_AUTO
-        elif source == FusionFlexSourceMode.INPUT_1:
-            command = RS232Command.SELECT_INPUT_1
-        elif source == FusionFlexSourceMode.INPUT_2:
-            command = RS232Command.SELECT_INPUT_2
-        else:
-            raise ValueError(f'unsupported input source "{IntEnum.name(source)}".')
-        self._send_command(command)
+        # accept only source modes (or their int values), not just anything
+        # that converts to an int:
+        if not isinstance(source, int) or isinstance(source, bool):
+            raise ValueError(f'unsupported input source "{source}".')
+        try:
+            source = FusionFlexSourceMode(source)
+        except ValueError:
+            raise ValueError(f'unsupported input source "{source}".') from None
+        self._send_command(_SELECT_INPUT_COMMANDS[source])
 
     def volume_up(self):
         """Increase volume by 0.5dB."""
@@ -0,0 +1,355 @@
+# SPDX-FileCopyrightText: 2022-present idisis <nir.idisis@gmail.com>
+#
+# SPDX-License-Identifier: GPL
+"""Tests for the Fusion Flex protocol and device."""
+import asyncio
+
+import pytest
+import serial_asyncio
+
+from emotiva_rs232 import ConnectionType, FusionFlexDevice, FusionFlexSourceMode
+from emotiva_rs232.fusion_flex import _BUFFER_SIZE, FusionFlexProtocol
+
+
+def _process_datagrams(chunks):
+    """Feed chunks to the protocol as datagrams and return the messages."""
+    messages = []
+    protocol = FusionFlexProtocol(("127.0.0.1", 5000), messages.append)
+    for chunk in chunks:
+        protocol._process_data(chunk)
+    return messages
+
+
+def _process_serial_reads(chunks):
+    """Feed chunks to the protocol as serial reads and return the messages."""
+    messages = []
+
+    async def _feed():
+        protocol = FusionFlexProtocol("COM1", messages.append)
+        for chunk in chunks:
+            protocol.data_received(chunk)
+            await asyncio.sleep(0)
+
+    asyncio.run(_feed())
+    return messages
+
+
+_CASES = [
+    # a single message:
+    ([b"'@112'"], [b"'@112'"]),
+    # a message split over several chunks:
+    ([b"'@1", b"1P-4", b"0.5'"], [b"'@11P-40.5'"]),
+    # a message split between its "'" and "@":
+    ([b"junk'", b"@112'"], [b"'@112'"]),
+    ([b"'@11Q'", b"'", b"@11R'"], [b"'@11Q'", b"'@11R'"]),
+    # back-to-back messages:
+    ([b"'@11Q''@11R'"], [b"'@11Q'", b"'@11R'"]),
+    ([b"'@11Q'", b"'@11R'"], [b"'@11Q'", b"'@11R'"]),
+    # a truncated message followed by a new one:
+    ([b"'@11", b"'@112'"], [b"'@112'"]),
+    ([b"'@11P-40.5", b"'@11Q'"], [b"'@11Q'"]),
+    ([b"'@11P-40.5'@11Q'"], [b"'@11Q'"]),
+    # overflow past the buffer size:
+    ([b"'@" + b"1" * _BUFFER_SIZE, b"1'"], []),
+    ([b"'@" + b"1" * _BUFFER_SIZE, b"1'@112'"], [b"'@112'"]),
+    # non-ASCII noise:
+    ([b"\xff\xfe'@112'\x80"], [b"'@112'"]),
+    ([b"\xff", b"'@11Q'", b"\xc3\xa9"], [b"'@11Q'"]),
+]
+
+
+@pytest.mark.parametrize("chunks, expected", _CASES)
+def test_process_data(chunks, expected):
+    assert _process_datagrams(chunks) == expected
+
+
+@pytest.mark.parametrize("chunks, expected", _CASES)
+def test_data_received(chunks, expected):
+    assert _process_serial_reads(chunks) == expected
+
+
+def test_process_data_with_raising_callback():
+    messages = []
+
+    def _message_received(msg):
+        messages.append(msg)
+        raise RuntimeError("callback failed")
+
+    protocol = FusionFlexProtocol(("127.0.0.1", 5000), _message_received)
+    for _ in range(5):
+        with pytest.raises(RuntimeError):
+            protocol._process_data(b"'@112'junk")
+    with pytest.raises(RuntimeError):
+        protocol._process_data(b"'@11Q''@11R'")
+    # each message is delivered once, and the buffer stays bounded:
+    assert messages == [b"'@112'"] * 5 + [b"'@11Q'"]
+    assert len(protocol._buffer) <= _BUFFER_SIZE
+    with pytest.raises(RuntimeError):
+        protocol._process_data(b"")
+    assert messages[-1] == b"'@11R'"
+
+
+def test_data_received_coalesces_reads():
+    messages = []
+
+    async def _feed():
+        protocol = FusionFlexProtocol("COM1", messages.append)
+        protocol.data_received(b"'@1")
+        protocol.data_received(b"12'")
+        protocol.data_received(b"'@11Q'")
+        assert not messages  # nothing is parsed until the drain runs.
+        await asyncio.sleep(0)
+
+    asyncio.run(_feed())
+    assert messages == [b"'@112'", b"'@11Q'"]
+
+
+def test_data_received_after_connection_lost():
+    messages = []
+
+    async def _feed():
+        protocol = FusionFlexProtocol("COM1", messages.append)
+        protocol.data_received(b"'@112'")
+        protocol.connection_lost(None)
+        await asyncio.sleep(0)
+
+    asyncio.run(_feed())
+    assert not messages
+
+
+def _create_device():
+    return FusionFlexDevice(
+        ConnectionType.UDP, remote_hostname="127.0.0.1", remote_port=5000
+    )
+
+
+def test_endpoint_accessors():
+    device = FusionFlexDevice(
+        ConnectionType.UDP,
+        local_ip="192.168.1.2",
+        local_port=6000,
+        remote_hostname="192.168.1.3",
+        remote_port=5000,
+    )
+    assert device.local_ip == "192.168.1.2"
+    assert device.local_port == 6000
+    assert device.remote_hostname == "192.168.1.3"
+    assert device.remote_port == 5000
+
+
+@pytest.mark.parametrize(
+    "msg, volume_db",
+    [
+        (b"'@11S-40.5'", -40.5),
+        (b"'@11T-40.0'", -40.0),
+        (b"'@11P-95.5'", -95.5),
+        (b"'@11P-00.0'", 0.0),
+    ],
+)
+def test_process_volume_message(msg, volume_db):
+    device = _create_device()
+    device._process_message(msg)
+    assert device.status.volume_db == volume_db
+    assert device.status.is_turned_on
+
+
+@pytest.mark.parametrize(
+    "msg",
+    [
+        b"'@11P-40.3'",
+        b"'@11X-40.5'",
+        b"'@11P+40.5'",
+        b"'@11P-4a.5'",
+        b"'@11P-40.5",
+        b"'@1\xff'",
+    ],
+)
+def test_process_unknown_message(msg):
+    device = _create_device()
+    changes = []
+    device.set_status_changed(changes.append)
+    device._process_message(msg)
+    assert not changes
+    assert device.status.volume_db is None
+    assert not device.status.is_turned_on
+
+
+@pytest.mark.parametrize(
+    "msg, attribute, value",
+    [
+        (b"'@112'", "is_turned_on", True),
+        (b"'@15A'", "source_mode", FusionFlexSourceMode.INPUT_1),
+        (b"'@15B'", "source_mode", FusionFlexSourceMode.INPUT_2),
+        (b"'@15Z'", "source_mode", FusionFlexSourceMode.AUTO),
+        (b"'@11Q'", "is_muted", True),
+        (b"'@11R'", "is_muted", False),
+    ],
+)
+def test_process_non_volume_message(msg, attribute, value):
+    device = _create_device()
+    changes = []
+    device.set_status_changed(changes.append)
+    device._process_message(msg)
+    assert getattr(device.status, attribute) == value
+    assert device.status.is_turned_on
+    assert changes == [device]
+
+
+def test_process_power_off_message():
+    device = _create_device()
+    device._process_message(b"'@112'")
+    device._process_message(b"'@113'")
+    assert not device.status.is_turned_on
+
+
+def _create_connected_device():
+    """Create a device whose protocol records the outgoing commands."""
+    device = _create_device()
+    sent = []
+    protocol = FusionFlexProtocol(("127.0.0.1", 5000), None)
+    protocol._send_impl = sent.append
+    device._protocol = protocol
+    return device, sent
+
+
+@pytest.mark.parametrize(
+    "fraction, command",
+    [
+        (0.0, b"'@11P-95.5'"),
+        (0.5, b"'@11P-48.0'"),
+        (0.9, b"'@11P-09.5'"),
+        (1.0, b"'@11P-00.0'"),
+    ],
+)
+def test_set_volume_level_fraction(fraction, command):
+    device, sent = _create_connected_device()
+    device.set_volume_level_fraction(fraction)
+    assert sent == [command]
+
+
+def test_set_volume_level_fraction_matches_decibels():
+    device, sent = _create_connected_device()
+    for i in range(1001):
+        fraction = i / 1000
+        device.set_volume_level_fraction(fraction)
+        device.set_volume_level_decibels(
+            FusionFlexDevice.volume_fraction_to_decibels(fraction)
+        )
+        assert sent[0] == sent[1]
+        sent.clear()
+
+
+@pytest.mark.parametrize("fraction", [-0.1, 1.1])
+def test_set_volume_level_fraction_out_of_range(fraction):
+    device, sent = _create_connected_device()
+    with pytest.raises(ValueError):
+        device.set_volume_level_fraction(fraction)
+    assert not sent
+
+
+@pytest.mark.parametrize(
+    "source, command",
+    [
+        (FusionFlexSourceMode.AUTO, b"'@15Z'"),
+        (FusionFlexSourceMode.INPUT_1, b"'@15A'"),
+        (FusionFlexSourceMode.INPUT_2, b"'@15B'"),
+    ],
+)
+def test_select_input_source(source, command):
+    device, sent = _create_connected_device()
+    device.select_input_source(source)
+    assert sent == [command]
+
+
+@pytest.mark.parametrize("source", [3, -1, "1", True, 1.9, 1.0, None])
+def test_select_input_source_unsupported(source):
+    device, sent = _create_connected_device()
+    with pytest.raises(ValueError):
+        device.select_input_source(source)
+    assert not sent
+
+
+class _FakeSerialTransport(serial_asyncio.SerialTransport):
+    """A serial transport that records written data."""
+
+    def __init__(self):  # pylint: disable=super-init-not-called
+        self.written = []
+
+    def __repr__(self):
+        return "_FakeSerialTransport()"
+
+    def write(self, data):
+        self.written.append(data)
+
+
+class _FakeDatagramTransport:
+    """A datagram transport (not deriving from asyncio.DatagramTransport)."""
+
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, addr=None):
+        self.sent.append((data, addr))
+
+
+def test_send_over_serial_transport():
+    transport = _FakeSerialTransport()
+    protocol = FusionFlexProtocol("COM1", None)
+    protocol.connection_made(transport)
+    protocol.send("'@112'")
+    assert transport.written == [b"'@112'"]
+
+
+def test_send_over_datagram_transport():
+    transport = _FakeDatagramTransport()
+    protocol = FusionFlexProtocol(("127.0.0.1", 5000), None)
+    protocol.connection_made(transport)
+    protocol.send("'@113'")
+    assert transport.sent == [(b"'@113'", ("127.0.0.1", 5000))]
+
+
+def test_send_over_udp_loopback():
+    received = []
+
+    class _Receiver(asyncio.DatagramProtocol):
+        def datagram_received(self, data, addr):
+            received.append(data)
+
+    async def _send():
+        loop = asyncio.get_running_loop()
+        receiver, _ = await loop.create_datagram_endpoint(
+            _Receiver, local_addr=("127.0.0.1", 0)
+        )
+        remote_endpoint = receiver.get_extra_info("sockname")
+        transport, protocol = await loop.create_datagram_endpoint(
+            lambda: FusionFlexProtocol(remote_endpoint, None),
+            remote_addr=remote_endpoint,
+        )
+        try:
+            protocol.send("'@11Q'")
+            for _ in range(100):
+                if received:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            transport.close()
+            receiver.close()
+
+    asyncio.run(_send())
+    assert received == [b"'@11Q'"]
+
+
+def test_connection_made_with_unsupported_transport():
+    protocol = FusionFlexProtocol("COM1", None)
+    with pytest.raises(NotImplementedError):
+        protocol.connection_made(object())
+
+
+def test_send_after_connection_lost():
+    transport = _FakeSerialTransport()
+    protocol = FusionFlexProtocol("COM1", None)
+    protocol.connection_made(transport)
+    protocol.connection_lost(None)
+    with pytest.raises(ConnectionError):
+        protocol.send("'@112'")
+    assert not transport.written